@@ -1,7 +1,12 @@
 ﻿from __future__ import annotations
 
+import asyncio
+import functools
+import importlib.util
+import os
 from typing import Any
 
+import anyio.to_thread
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
@@ -9,7 +14,23 @@ from src.app_core.pdf import PdfGenerationError
 from src.app_core.pipeline import PipelineResult, run_pipeline
 from src.app_core.printing import PrintError, list_printers, print_pdf
 
-app = FastAPI(title="PickingSystem API", version="0.1.0")
+# orjson があればレスポンスのシリアライズを C 実装に切り替える
+# (Content-Type は application/json のまま)。無い環境では既定の JSONResponse。
+# ORJSONResponse 自体は orjson 無しでも import できてしまうため、orjson の有無を直接確認する。
+if importlib.util.find_spec("orjson") is not None:
+    from fastapi.responses import ORJSONResponse as _ResponseClass
+else:  # pragma: no cover - orjson は任意依存
+    from fastapi.responses import JSONResponse as _ResponseClass  # type: ignore[assignment]
+
+app = FastAPI(
+    title="PickingSystem API",
+    version="0.1.0",
+    default_response_class=_ResponseClass,
+)
+
+# 重い生成処理の同時実行数。Chromium / wkhtmltopdf を並列で起動しすぎないための上限。
+_MAX_CONCURRENT_RENDERS = int(os.environ.get("PICKING_MAX_CONCURRENT_RENDERS", "2"))
+_render_semaphore = asyncio.Semaphore(_MAX_CONCURRENT_RENDERS)
 
 
 class RenderPayload(BaseModel):
@@ -26,25 +47,30 @@ class PrintPayload(BaseModel):
 
 
 @app.get("/health")
-def health() -> dict[str, Any]:
+async def health() -> dict[str, Any]:
     return {"status": "ok"}
 
 
 @app.get("/printers")
-def printers() -> dict[str, Any]:
-    return {"printers": list_printers()}
+async def printers() -> dict[str, Any]:
+    # EnumPrinters はスプーラ次第で数百 ms ブロックするためループに乗せない。
+    return {"printers": await anyio.to_thread.run_sync(list_printers)}
 
 
 @app.post("/render")
-def render(payload: RenderPayload) -> dict[str, Any]:
+async def render(payload: RenderPayload) -> dict[str, Any]:
     try:
-        result: PipelineResult = run_pipeline(
-            shipment_path=payload.shipment_path,
-            master_path=payload.master_path,
-            template_dir=payload.template_dir,
-            out_dir=payload.out_dir,
-            bom_path=payload.bom_path,
-        )
+        async with _render_semaphore:
+            result: PipelineResult = await anyio.to_thread.run_sync(
+                functools.partial(
+                    run_pipeline,
+                    shipment_path=payload.shipment_path,
+                    master_path=payload.master_path,
+                    template_dir=payload.template_dir,
+                    out_dir=payload.out_dir,
+                    bom_path=payload.bom_path,
+                )
+            )
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=f"ファイルが見つかりません: {exc}") from exc
     except ValueError as exc:
@@ -63,9 +89,11 @@ def render(payload: RenderPayload) -> dict[str, Any]:
 
 
 @app.post("/print")
-def print_endpoint(payload: PrintPayload) -> dict[str, Any]:
+async def print_endpoint(payload: PrintPayload) -> dict[str, Any]:
     try:
-        print_pdf(payload.pdf_path, payload.printer_name)
+        await anyio.to_thread.run_sync(
+            functools.partial(print_pdf, payload.pdf_path, payload.printer_name)
+        )
     except PrintError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
     return {"status": "queued"}
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -7,6 +8,11 @@ from typing import Any
 import yaml
 from pydantic import BaseModel, Field, model_validator
 
+try:
+    from yaml import CSafeLoader as _YamlLoader  # type: ignore[attr-defined]
+except ImportError:  # pragma: no cover - libyaml が無い環境向け
+    from yaml import SafeLoader as _YamlLoader  # type: ignore[assignment]
+
 
 class SpecModel(BaseModel):
     name: str
@@ -45,12 +51,13 @@ class PipelineConfig(BaseModel):
         mapping: dict[str, Any] = values.get("mapping", {})
         normalized: dict[str, list[str]] = {}
         for key, raw in mapping.items():
-            if raw is None:
-                normalized[key] = []
-            elif isinstance(raw, str):
+            if isinstance(raw, str):
                 normalized[key] = [raw]
+            elif raw is None:
+                normalized[key] = []
             else:
-                normalized[key] = [str(item) for item in raw]
+                # YAML 由来のリストは大半が str 要素なので str() 呼び出しを省く
+                normalized[key] = [item if isinstance(item, str) else str(item) for item in raw]
         values["mapping"] = normalized
         return values
 
@@ -69,14 +76,33 @@ class LoadedConfig:
     data: PipelineConfig
 
 
+# mtime+size で検証した解析済み設定のキャッシュ。LoadedConfig は読み取り専用なので
+# コピーせずそのまま返せる。
+_CONFIG_CACHE: OrderedDict[Path, tuple[float, int, LoadedConfig]] = OrderedDict()
+_CONFIG_CACHE_MAX = 32
+
+
 def load_config(path: str | Path = "src/config/spec.yml") -> LoadedConfig:
     config_path = Path(path)
     if not config_path.exists():
         raise FileNotFoundError(f"設定ファイルが見つかりません: {config_path}")
+
+    stat = config_path.stat()
+    cached = _CONFIG_CACHE.get(config_path)
+    if cached is not None and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        _CONFIG_CACHE.move_to_end(config_path)
+        return cached[2]
+
     with config_path.open("r", encoding="utf-8") as fp:
-        raw: dict[str, Any] = yaml.safe_load(fp)
+        raw: dict[str, Any] = yaml.load(fp, Loader=_YamlLoader)
     data = PipelineConfig.model_validate(raw)
-    return LoadedConfig(source=config_path, data=data)
+    loaded = LoadedConfig(source=config_path, data=data)
+
+    _CONFIG_CACHE[config_path] = (stat.st_mtime, stat.st_size, loaded)
+    _CONFIG_CACHE.move_to_end(config_path)
+    while len(_CONFIG_CACHE) > _CONFIG_CACHE_MAX:
+        _CONFIG_CACHE.popitem(last=False)
+    return loaded
 
 
 __all__ = ["BomConfig", "LoadedConfig", "PipelineConfig", "load_config"]
@@ -1,20 +1,93 @@
 ﻿from __future__ import annotations
 
+import atexit
+import concurrent.futures
 import shutil
 import subprocess
 from pathlib import Path
+from typing import Any
 
 from rich import print
 
+try:
+    import weasyprint  # type: ignore
+except Exception:  # pragma: no cover - weasyprint は任意依存
+    weasyprint = None  # type: ignore
+
 
 class PdfGenerationError(RuntimeError):
     pass
 
 
+# Chromium の起動は数百 ms かかるため、ブラウザはプロセス内で使い回し、
+# ジョブごとには隔離のための BrowserContext のみ作る。
+# sync Playwright は start したスレッド (greenlet) に縛られるため、起動から
+# PDF 生成・終了まで全操作を専用の単一スレッドで行う。max_workers=1 なので
+# 同時リクエストの直列化も兼ねる。
+_playwright_exec = concurrent.futures.ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="playwright"
+)
+_playwright: Any = None
+_browser: Any = None
+
+
+def _shutdown_browser() -> None:
+    # _playwright_exec のスレッド上でのみ呼ぶこと。
+    global _playwright, _browser
+    if _browser is not None:
+        try:
+            _browser.close()
+        except Exception:
+            pass
+        _browser = None
+    if _playwright is not None:
+        try:
+            _playwright.stop()
+        except Exception:
+            pass
+        _playwright = None
+
+
+def _shutdown_browser_at_exit() -> None:
+    try:
+        _playwright_exec.submit(_shutdown_browser).result()
+    except Exception:  # pragma: no cover - インタプリタ終了間際の投入失敗は無視
+        pass
+
+
+def _get_browser() -> Any:
+    global _playwright, _browser
+    # Chromium がクラッシュ・切断していたら捨てて次で起動し直す
+    # (切断済みインスタンスを使い回すと以後のジョブが全滅する)。
+    if _browser is not None and not _browser.is_connected():
+        try:
+            _browser.close()
+        except Exception:
+            pass
+        _browser = None
+    if _browser is None:
+        if _playwright is None:
+            try:
+                from playwright.sync_api import sync_playwright
+            except Exception as exc:
+                raise PdfGenerationError(
+                    "Playwright の読み込みに失敗しました。pip install playwright と playwright install chromium を実行してください。"
+                ) from exc
+            _playwright = sync_playwright().start()
+            atexit.register(_shutdown_browser_at_exit)
+        _browser = _playwright.chromium.launch()
+    return _browser
+
+
 def _wkhtmltopdf_exists() -> bool:
     return shutil.which("wkhtmltopdf") is not None
 
 
+def _generate_with_weasyprint(html: Path, pdf: Path) -> None:
+    # プロセス内で完結するためサブプロセス起動コストが掛からない。
+    weasyprint.HTML(filename=str(html)).write_pdf(str(pdf))
+
+
 def _generate_with_wkhtmltopdf(html: Path, pdf: Path) -> None:
     command = ["wkhtmltopdf", str(html), str(pdf)]
     result = subprocess.run(command, capture_output=True, text=True)
@@ -22,32 +95,34 @@ def _generate_with_wkhtmltopdf(html: Path, pdf: Path) -> None:
         raise PdfGenerationError("wkhtmltopdf の実行に失敗しました:\n" + result.stderr.strip())
 
 
-def _generate_with_playwright(html: Path, pdf: Path) -> None:
+def _render_on_playwright_thread(html: Path, pdf: Path) -> None:
+    browser = _get_browser()
+    context = browser.new_context()
     try:
-        from playwright.sync_api import sync_playwright
-    except Exception as exc:
-        raise PdfGenerationError(
-            "Playwright の読み込みに失敗しました。pip install playwright と playwright install chromium を実行してください。"
-        ) from exc
-
-    file_url = html.resolve().as_uri()
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
-        page.goto(file_url)
+        page = context.new_page()
+        page.goto(html.resolve().as_uri())
         page.pdf(
             path=str(pdf),
             format="A4",
             print_background=True,
             margin={"top": "5mm", "bottom": "5mm", "left": "5mm", "right": "5mm"},
         )
-        browser.close()
+    finally:
+        context.close()
+
+
+def _generate_with_playwright(html: Path, pdf: Path) -> None:
+    # 呼び出し元 (anyio のワーカー等) のスレッドからは直接触らず、
+    # 常に専用スレッドへ投げて結果を待つ。例外はそのまま伝播する。
+    _playwright_exec.submit(_render_on_playwright_thread, html, pdf).result()
 
 
 def generate_pdf(html_path: Path, pdf_path: Path) -> Path:
     pdf_path.parent.mkdir(parents=True, exist_ok=True)
     try:
-        if _wkhtmltopdf_exists():
+        if weasyprint is not None:
+            _generate_with_weasyprint(html_path, pdf_path)
+        elif _wkhtmltopdf_exists():
             _generate_with_wkhtmltopdf(html_path, pdf_path)
         else:
             print("[yellow]wkhtmltopdf が見つかりません。Playwright で PDF を生成します。[/yellow]")
@@ -1,27 +1,56 @@
 from __future__ import annotations
 
+import base64
+import concurrent.futures
+import functools
+import io
 import re
 import unicodedata
 from collections import defaultdict
 from collections.abc import Sequence
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
-from typing import Any
-
-import pandas as pd
-import qrcode
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from typing import TYPE_CHECKING, Any
 
 from .config import BomConfig, LoadedConfig, PipelineConfig, load_config
 from .pdf import generate_pdf
 
+if TYPE_CHECKING:
+    import pandas as pd
+    from jinja2 import Environment
+
 
-def _slugify(value: str) -> str:
-    value = unicodedata.normalize("NFKC", value)
-    value = value.strip().replace("/", "-")
-    value = re.sub(r"[^0-9A-Za-z_-]+", "_", value)
-    return value or "qr"
+_DECIMAL_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+
+def _render_qr(product_code: str) -> bytes:
+    """1 件の QR コードを PNG バイト列として生成する (プロセスプール用トップレベル関数)。"""
+    buffer = io.BytesIO()
+    try:
+        # segno は PIL を介さず PNG を直接出力できて数倍速い。
+        import segno
+    except ImportError:
+        segno = None
+
+    if segno is not None:
+        qr = segno.make(product_code, error="m", micro=False)
+        qr.save(buffer, kind="png", scale=4, border=1, dark="black", light="white")
+        return buffer.getvalue()
+
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=2,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=4,
+        border=1,
+    )
+    qr.add_data(product_code)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
 
 
 @dataclass(slots=True)
@@ -45,9 +74,17 @@ class PickingRow:
     unit: str = ""
 
 
+_WS_TABLE = str.maketrans("", "", " \t\r\n\x0b\x0c")
+_WS_RE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=4096)
 def _clean_column(name: str) -> str:
-    normalized = unicodedata.normalize("NFKC", str(name).strip())
-    return re.sub(r"\s+", "", normalized)
+    # 列名・品目コードは種類が少なく同じ値が繰り返し来るためキャッシュが効く。
+    text = str(name).strip()
+    if text.isascii():
+        return text.translate(_WS_TABLE)
+    return _WS_RE.sub("", unicodedata.normalize("NFKC", text))
 
 
 def _expected_columns(config: PipelineConfig) -> set[str]:
@@ -61,20 +98,25 @@ def _expected_columns(config: PipelineConfig) -> set[str]:
 
 
 def load_excel(path: str, *, config: PipelineConfig | None = None) -> pd.DataFrame:
+    import pandas as pd
+
     headers_to_try = [0] if config is None else [0, 1, 2, 3, 4]
     expected = _expected_columns(config) if config else set()
     last_df: pd.DataFrame | None = None
 
-    for header in headers_to_try:
-        df = pd.read_excel(path, header=header, dtype=str)
-        df.columns = ["" if pd.isna(col) else _clean_column(col) for col in df.columns]
-        last_df = df
-        if config is None:
-            return df.fillna("")
-        join_key = _clean_column(config.join_key)
-        if join_key in df.columns or expected.intersection(df.columns):
-            filtered = [col for col in df.columns if col and not col.startswith("Unnamed")]
-            return df.loc[:, filtered].fillna("")
+    # ヘッダ行の探索でブックを毎回開き直さず、解析済みワークブックを使い回す。
+    with pd.ExcelFile(path) as excel:
+        sheet = excel.sheet_names[0]
+        for header in headers_to_try:
+            df = excel.parse(sheet, header=header, dtype=str)
+            df.columns = ["" if pd.isna(col) else _clean_column(col) for col in df.columns]
+            last_df = df
+            if config is None:
+                return df.fillna("")
+            join_key = _clean_column(config.join_key)
+            if join_key in df.columns or expected.intersection(df.columns):
+                filtered = [col for col in df.columns if col and not col.startswith("Unnamed")]
+                return df.loc[:, filtered].fillna("")
 
     if config is None:
         if last_df is not None:
@@ -103,14 +145,18 @@ def coalesce(row: dict[str, Any], candidates: Sequence[str]) -> str:
     return ""
 
 
-def resolve_field(config: PipelineConfig, row: dict[str, Any], field: str) -> str:
+def _field_candidates(config: PipelineConfig, field: str) -> list[str]:
     candidates: list[str] = []
     for base in config.mapping.get(field, []):
         cleaned = _clean_column(base)
         candidates.append(cleaned)
         candidates.append(f"{cleaned}_in")
         candidates.append(f"{cleaned}_mst")
-    return coalesce(row, candidates)
+    return candidates
+
+
+def resolve_field(config: PipelineConfig, row: dict[str, Any], field: str) -> str:
+    return coalesce(row, _field_candidates(config, field))
 
 
 def _normalize_code_value(value: str) -> str:
@@ -125,9 +171,7 @@ def _parse_decimal(value: str) -> Decimal | None:
     try:
         return Decimal(text)
     except InvalidOperation:
-        import re
-
-        matches = re.findall(r"[-+]?\d+(?:\.\d+)?", text)
+        matches = _DECIMAL_RE.findall(text)
         for candidate in reversed(matches):
             try:
                 return Decimal(candidate)
@@ -158,10 +202,12 @@ def _build_master_lookup(master: pd.DataFrame, join_key: str) -> dict[str, dict[
 
     cleaned_join_key = _clean_column(join_key)
     filled = master.fillna("")
-    for _, rec in filled.iterrows():
+    # dtype=str で読まれたマスタは文字列のままコピーし、normalize_value は
+    # 非文字列セルにだけかける。
+    for rec in filled.to_dict(orient="records"):
         row_dict: dict[str, str] = {}
-        for col in filled.columns:
-            value = normalize_value(rec[col])
+        for col, raw in rec.items():
+            value = raw if type(raw) is str else normalize_value(raw)
             row_dict[col] = value
             row_dict[f"{col}_mst"] = value
         key = _normalize_code_value(row_dict.get(cleaned_join_key, ""))
@@ -171,7 +217,42 @@ def _build_master_lookup(master: pd.DataFrame, join_key: str) -> dict[str, dict[
     return lookup
 
 
+_PLAIN_NUMBER_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+
+def _parse_scaled_int(text: str) -> tuple[int, int] | None:
+    """桁区切り除去済みの数値文字列を (整数値, 小数桁数) に分解する。"""
+    if not _PLAIN_NUMBER_RE.fullmatch(text):
+        return None
+    if "." in text:
+        whole, frac = text.split(".")
+        return int(whole + frac), len(frac)
+    return int(text), 0
+
+
+def _format_scaled(value: int, exponent: int) -> str:
+    if exponent == 0:
+        return str(value)
+    sign = "-" if value < 0 else ""
+    digits = str(abs(value)).rjust(exponent + 1, "0")
+    text = f"{sign}{digits[:-exponent]}.{digits[-exponent:]}"
+    return text.rstrip("0").rstrip(".")
+
+
 def _compute_child_quantity(parent_qty: str, base_qty: str) -> tuple[str, str]:
+    # 通常の数値同士は整数演算で厳密に計算し、Decimal のコストを避ける。
+    parent_text = normalize_value(parent_qty).replace(",", "")
+    base_text = normalize_value(base_qty).replace(",", "")
+    parent_scaled = _parse_scaled_int(parent_text) if parent_text else None
+    base_scaled = _parse_scaled_int(base_text) if base_text else None
+    if parent_scaled is not None and base_scaled is not None:
+        result_text = _format_scaled(
+            parent_scaled[0] * base_scaled[0], parent_scaled[1] + base_scaled[1]
+        )
+        note = f"{_format_scaled(*parent_scaled)} × {_format_scaled(*base_scaled)}"
+        return result_text, note
+
+    # 指数表記や単位混じりの値は従来どおり Decimal で処理する。
     parent_dec = _parse_decimal(parent_qty)
     base_dec = _parse_decimal(base_qty)
     if parent_dec is not None and base_dec is not None:
@@ -183,8 +264,14 @@ def _compute_child_quantity(parent_qty: str, base_qty: str) -> tuple[str, str]:
 
 
 def load_bom(path: str | Path) -> pd.DataFrame:
+    import pandas as pd
+
     bom_path = Path(path)
-    df = pd.read_csv(bom_path, sep="	", dtype=str)
+    try:
+        # pyarrow のマルチスレッド CSV リーダは C エンジンより数倍速い。
+        df = pd.read_csv(bom_path, sep="	", dtype=str, engine="pyarrow")
+    except (ImportError, ValueError):  # pyarrow 未導入の環境では従来エンジン
+        df = pd.read_csv(bom_path, sep="	", dtype=str)
     df = df.fillna("")
     df.columns = [_clean_column(col) for col in df.columns]
     return df
@@ -234,6 +321,37 @@ def build_bom_lookup(data: pd.DataFrame, config: BomConfig) -> BomLookup:
     return lookup
 
 
+def _bom_config_key(config: BomConfig) -> tuple[str | None, ...]:
+    return (
+        config.parent_key,
+        config.child_key,
+        config.child_name,
+        config.quantity,
+        config.sequence,
+        config.unit,
+        config.child_type,
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _bom_lookup_cached(
+    path: str, mtime: float, size: int, config_key: tuple[str | None, ...]
+) -> BomLookup:
+    """mtime+size で無効化される BOM ルックアップのキャッシュ本体。"""
+    del mtime, size  # キャッシュキーとしてのみ使用
+    config = BomConfig(
+        path=path,
+        parent_key=config_key[0] or "",
+        child_key=config_key[1] or "",
+        child_name=config_key[2] or "",
+        quantity=config_key[3] or "",
+        sequence=config_key[4],
+        unit=config_key[5],
+        child_type=config_key[6],
+    )
+    return build_bom_lookup(load_bom(path), config)
+
+
 def join_and_map(
     shipment: pd.DataFrame,
     master: pd.DataFrame,
@@ -243,13 +361,6 @@ def join_and_map(
 ) -> list[PickingRow]:
     join_key = _clean_column(config.join_key)
     master_lookup = _build_master_lookup(master, join_key)
-    merged = shipment.merge(
-        master,
-        how="left",
-        left_on=join_key,
-        right_on=join_key,
-        suffixes=("_in", "_mst"),
-    )
 
     lookup = bom_lookup or {}
     rows: list[PickingRow] = []
@@ -262,28 +373,55 @@ def join_and_map(
         if column_name:
             master_location_column = _clean_column(str(column_name))
 
-    for _, record in merged.fillna("").iterrows():
-        data = record.to_dict()
-        product_code = resolve_field(config, data, "productCode") or normalize_value(data.get(join_key))
-        raw_parent_quantity = resolve_field(config, data, "quantity")
+    # マージは行わず、出荷側は列配列、マスタ側は _build_master_lookup の
+    # 辞書をそのまま参照する。候補ごとに出荷列→マスタ行の順で解決するので
+    # 旧 suffixes=("_in", "_mst") の優先順位と同じになる。
+    filled = shipment.fillna("")
+    field_candidates = {field: _field_candidates(config, field) for field in config.mapping}
+    field_sources: dict[str, list[tuple[Any, str]]] = {}
+    for field, bases in config.mapping.items():
+        sources: list[tuple[Any, str]] = []
+        for base in bases:
+            cleaned = _clean_column(base)
+            array = filled[cleaned].to_numpy(dtype=object) if cleaned in filled.columns else None
+            sources.append((array, cleaned))
+        field_sources[field] = sources
+
+    def _resolve(field: str, index: int, master_row: dict[str, str]) -> str:
+        for array, key in field_sources.get(field, ()):
+            if array is not None:
+                value = array[index]
+                if value not in (None, ""):
+                    return normalize_value(value)
+            value = master_row.get(key, "")
+            if value not in (None, ""):
+                return normalize_value(value)
+        return ""
+
+    join_values = filled[join_key].to_numpy(dtype=object) if join_key in filled.columns else None
+
+    for i in range(len(filled)):
+        join_value = normalize_value(join_values[i]) if join_values is not None else ""
+        master_row = master_lookup.get(_normalize_code_value(join_value), {})
+        product_code = _resolve("productCode", i, master_row) or join_value
+        raw_parent_quantity = _resolve("quantity", i, master_row)
         parent_quantity = _display_quantity(raw_parent_quantity)
         parent_location = ""
         if master_location_column:
-            parent_location = normalize_value(
-                data.get(master_location_column, "")
-                or data.get(f"{master_location_column}_mst", "")
-            )
+            parent_location = normalize_value(master_row.get(master_location_column, ""))
+        if not parent_location:
+            parent_location = _resolve("location", i, master_row)
 
         parent_row = PickingRow(
-            shipDate=resolve_field(config, data, "shipDate"),
-            clientCode=resolve_field(config, data, "clientCode"),
-            notice=resolve_field(config, data, "notice"),
+            shipDate=_resolve("shipDate", i, master_row),
+            clientCode=_resolve("clientCode", i, master_row),
+            notice=_resolve("notice", i, master_row),
             productCode=product_code,
             location=parent_location,
             quantity=parent_quantity,
-            itemType=resolve_field(config, data, "itemType"),
-            productName=resolve_field(config, data, "productName"),
-            orderNumber=resolve_field(config, data, "orderNumber"),
+            itemType=_resolve("itemType", i, master_row),
+            productName=_resolve("productName", i, master_row),
+            orderNumber=_resolve("orderNumber", i, master_row),
             no=str(parent_index),
             sequence=sequence_counter,
         )
@@ -298,12 +436,12 @@ def join_and_map(
             child_master = master_lookup.get(child_code_key, {})
             child_product_name = (
                 child.get("productName", "")
-                or resolve_field(config, child_master, "productName")
+                or coalesce(child_master, field_candidates.get("productName", []))
                 or child_code_raw
             )
             child_item_type = (
                 child.get("itemType", "")
-                or resolve_field(config, child_master, "itemType")
+                or coalesce(child_master, field_candidates.get("itemType", []))
                 or parent_row.itemType
             )
             child_location = ""
@@ -312,8 +450,10 @@ def join_and_map(
                     child_master.get(master_location_column, "")
                     or child_master.get(f"{master_location_column}_mst", "")
                 )
+            if not child_location:
+                child_location = coalesce(child_master, field_candidates.get("location", []))
             child_notice = (
-                resolve_field(config, child_master, "notice")
+                coalesce(child_master, field_candidates.get("notice", []))
                 or parent_row.notice
             )
             result_qty, note = _compute_child_quantity(
@@ -352,21 +492,40 @@ def paginate(rows: Sequence[PickingRow], per_page: int) -> list[list[PickingRow]
     return pages
 
 
+@functools.lru_cache(maxsize=8)
+def _get_env(template_dir: str) -> Environment:
+    # Environment を使い回すことで Jinja のテンプレートキャッシュを活かし、
+    # バイトコードキャッシュでプロセス再起動後もコンパイル済みを再利用する。
+    from jinja2 import (
+        Environment,
+        FileSystemBytecodeCache,
+        FileSystemLoader,
+        select_autoescape,
+    )
+
+    # ディレクトリは Jinja に任せる: ユーザーごとに 0700 + 所有者チェック付きの
+    # 一時ディレクトリを作るため、共有パスを他ユーザーと取り合わない。
+    return Environment(
+        loader=FileSystemLoader(template_dir),
+        autoescape=select_autoescape(["html", "xml"]),
+        bytecode_cache=FileSystemBytecodeCache(),
+    )
+
+
 def render_html(
     pages: Sequence[Sequence[PickingRow]],
     template_dir: str | Path,
     output_path: str | Path,
 ) -> Path:
-    env = Environment(
-        loader=FileSystemLoader(str(template_dir)),
-        autoescape=select_autoescape(["html", "xml"]),
-    )
-    template = env.get_template("product_list_table.html")
-    html = template.render(pages=[[asdict(row) for row in page] for page in pages])
+    template = _get_env(str(template_dir)).get_template("product_list_table.html")
 
     destination = Path(output_path)
     destination.parent.mkdir(parents=True, exist_ok=True)
-    destination.write_text(html, encoding="utf-8")
+    # render() で全文を str に展開せず、チャンク単位でファイルへ書き出す。
+    # テンプレートは属性アクセスのみなので PickingRow をそのまま渡す。
+    stream = template.stream(pages=pages)
+    stream.enable_buffering(size=5)
+    stream.dump(str(destination), encoding="utf-8")
     return destination
 
 
@@ -404,8 +563,13 @@ def run_pipeline(
             effective_bom_config = BomConfig(path=str(candidate_bom_path))
         if not candidate_bom_path.exists():
             raise FileNotFoundError(f"BOMファイルが見つかりません: {candidate_bom_path}")
-        bom_df = load_bom(candidate_bom_path)
-        bom_lookup = build_bom_lookup(bom_df, effective_bom_config)
+        stat = candidate_bom_path.stat()
+        bom_lookup = _bom_lookup_cached(
+            str(candidate_bom_path),
+            stat.st_mtime,
+            stat.st_size,
+            _bom_config_key(effective_bom_config),
+        )
 
     rows = join_and_map(shipment_df, master_df, config.data, bom_lookup=bom_lookup)
     pages = paginate(rows, config.data.spec.items_per_page)
@@ -413,26 +577,23 @@ def run_pipeline(
     out_dir_path = Path(out_dir)
     out_dir_path.mkdir(parents=True, exist_ok=True)
 
-    qr_dir = out_dir_path / "qr"
-    qr_dir.mkdir(parents=True, exist_ok=True)
+    # QR はファイルに書かず base64 の data: URI としてテンプレートに埋め込む。
+    # 生成は行間に依存が無い CPU バウンド処理なのでプロセスプールへ分配し、
+    # 同じ品目コードは 1 回だけエンコードする。
+    seen: set[str] = set()
+    codes: list[str] = []
     for row in rows:
         product_code = row.productCode.strip()
-        if not product_code:
-            row.qr_path = ""
-            continue
-        filename = f"{row.sequence:03}_" + _slugify(product_code) + ".png"
-        img_path = qr_dir / filename
-        qr = qrcode.QRCode(
-            version=2,
-            error_correction=qrcode.constants.ERROR_CORRECT_M,
-            box_size=4,
-            border=1,
-        )
-        qr.add_data(product_code)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        img.save(img_path)
-        row.qr_path = img_path.as_posix()
+        if product_code and product_code not in seen:
+            seen.add(product_code)
+            codes.append(product_code)
+    data_uris: dict[str, str] = {}
+    if codes:
+        with concurrent.futures.ProcessPoolExecutor() as executor:
+            for code, png in zip(codes, executor.map(_render_qr, codes, chunksize=16), strict=True):
+                data_uris[code] = "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+    for row in rows:
+        row.qr_path = data_uris.get(row.productCode.strip(), "")
 
     html_path = render_html(pages, template_dir, out_dir_path / "picking.html")
     pdf_path = generate_pdf(html_path, out_dir_path / "picking.pdf")
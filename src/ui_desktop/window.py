@@ -0,0 +1,329 @@
+"""Qt GUI。auto-test モードでは PySide6 を読み込まないよう main.py から分離している。"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import os
+from pathlib import Path
+
+import requests
+from PySide6 import QtCore, QtGui, QtWidgets
+
+from src.ui_desktop.main import (
+    _DEFAULT_OUT_DIR_STR,
+    _TEMPLATE_DIR_STR,
+    API_URL,
+    _build_server,
+    _cached_list_printers,
+    _loads,
+    _post,
+)
+
+# ダイアログを開くたびに getcwd() を呼ばないよう、起動時の cwd を固定する。
+_STARTUP_CWD = str(Path.cwd())
+
+# サーバ側で pandas に読ませる前に弾く入力サイズ上限。
+_MAX_INPUT_BYTES = int(os.environ.get("PICKING_MAX_INPUT_MB", "200")) * 1024 * 1024
+
+
+class _JobSignals(QtCore.QObject):
+    finishedWithResult = QtCore.Signal(dict)
+    failed = QtCore.Signal(str)
+    done = QtCore.Signal()
+
+
+def _request_json(url: str, payload: dict[str, str | None], timeout: float) -> dict:
+    response = _post(url, payload, timeout=timeout)
+    response.raise_for_status()
+    return _loads(response.content)
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self) -> None:
+        super().__init__()
+        self.setWindowTitle("Picking System")
+        self.resize(720, 480)
+
+        central = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(central)
+
+        self.ship_edit = self._add_path_field(
+            layout,
+            "出荷計画.xlsx",
+            dialog_title="出荷計画 Excel を選択",
+        )
+        self.master_edit = self._add_path_field(
+            layout,
+            "品目マスタ.xlsx",
+            dialog_title="品目マスタ Excel を選択",
+        )
+        self.bom_edit = self._add_path_field(
+            layout,
+            "BOM TSV (任意)",
+            file_filter="TSV/TXT (*.txt *.tsv);;すべてのファイル (*.*)",
+            dialog_title="BOM ファイルを選択",
+        )
+        self.output_edit = self._add_path_field(layout, "出力先フォルダ", directory=True)
+        self.output_edit.setText(_DEFAULT_OUT_DIR_STR)
+
+        button_layout = QtWidgets.QHBoxLayout()
+        layout.addLayout(button_layout)
+
+        self.generate_btn = QtWidgets.QPushButton("生成")
+        self.generate_btn.clicked.connect(self._on_generate)
+        button_layout.addWidget(self.generate_btn)
+
+        self.print_btn = QtWidgets.QPushButton("印刷")
+        self.print_btn.clicked.connect(self._on_print)
+        self.print_btn.setEnabled(False)
+        button_layout.addWidget(self.print_btn)
+
+        self.printer_combo = QtWidgets.QComboBox()
+        self.printer_combo.addItem("読み込み中...")
+        button_layout.addWidget(self.printer_combo)
+
+        self.printer_refresh_btn = QtWidgets.QPushButton("更新")
+        self.printer_refresh_btn.clicked.connect(self._reload_printers)
+        button_layout.addWidget(self.printer_refresh_btn)
+
+        # 初回描画をブロックしないよう、プリンタ列挙はイベントループ開始後に行う
+        QtCore.QTimer.singleShot(0, self._refresh_printers)
+
+        self.log = QtWidgets.QPlainTextEdit()
+        self.log.setReadOnly(True)
+        layout.addWidget(self.log, stretch=1)
+
+        self.setCentralWidget(central)
+
+        self._last_pdf: str | None = None
+        # ファイルダイアログの初期位置。選択のたびに直近のフォルダを覚える。
+        self._last_dir = _STARTUP_CWD
+
+        # appendPlainText は呼ぶたびに再レイアウトが走るため、
+        # 50ms 窓でまとめて 1 回だけ追記する。
+        self._log_buf: list[str] = []
+        self._log_timer = QtCore.QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(50)
+        self._log_timer.timeout.connect(self._flush_log)
+
+        # クリックごとにワーカースレッドを生成・破棄せず、常駐の
+        # Executor を使い回す。印刷は 1 本に絞って投入順に直列化し、
+        # 生成は最大 2 件まで並行させる。
+        self._generate_exec = concurrent.futures.ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="generate"
+        )
+        self._print_exec = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="print"
+        )
+
+    def _add_path_field(
+        self,
+        layout: QtWidgets.QVBoxLayout,
+        label_text: str,
+        directory: bool = False,
+        *,
+        file_filter: str = "Excel (*.xlsx)",
+        dialog_title: str | None = None,
+    ) -> QtWidgets.QLineEdit:
+        box = QtWidgets.QHBoxLayout()
+        label = QtWidgets.QLabel(label_text)
+        edit = QtWidgets.QLineEdit()
+        button = QtWidgets.QPushButton("選択")
+        box.addWidget(label)
+        box.addWidget(edit, stretch=1)
+        box.addWidget(button)
+        layout.addLayout(box)
+
+        if directory:
+            button.clicked.connect(lambda: self._pick_directory(edit))
+        else:
+            title = dialog_title or "ファイルを選択"
+            button.clicked.connect(lambda: self._pick_file(edit, file_filter, title))
+        return edit
+
+    def _pick_file(
+        self,
+        target: QtWidgets.QLineEdit,
+        file_filter: str,
+        dialog_title: str,
+    ) -> None:
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            dialog_title,
+            self._last_dir,
+            file_filter,
+        )
+        if path:
+            self._last_dir = str(Path(path).parent)
+            target.setText(path)
+
+    def _pick_directory(self, target: QtWidgets.QLineEdit) -> None:
+        path = QtWidgets.QFileDialog.getExistingDirectory(
+            self, "出力先フォルダを選択", self._last_dir
+        )
+        if path:
+            self._last_dir = path
+            target.setText(path)
+
+    def _on_generate(self) -> None:
+        shipment = self.ship_edit.text().strip()
+        master = self.master_edit.text().strip()
+        bom = self.bom_edit.text().strip()
+        out_dir = self.output_edit.text().strip() or _DEFAULT_OUT_DIR_STR
+
+        if not self._check_input(shipment, "出荷計画ファイルを指定してください。", check_size=True):
+            return
+        if not self._check_input(master, "品目マスタファイルを指定してください。", check_size=True):
+            return
+        if bom and not self._check_input(bom, f"BOM ファイルが見つかりません: {bom}"):
+            return
+
+        payload = {
+            "shipment_path": shipment,
+            "master_path": master,
+            "template_dir": _TEMPLATE_DIR_STR,
+            "out_dir": out_dir,
+        }
+        if bom:
+            payload["bom_path"] = bom
+        self._log("生成処理を開始します...")
+        self.generate_btn.setEnabled(False)
+        signals = _JobSignals()
+        signals.finishedWithResult.connect(self._on_generate_success)
+        signals.failed.connect(self._on_generate_failed)
+        signals.done.connect(lambda: self.generate_btn.setEnabled(True))
+        self._worker = signals
+        self._submit(self._generate_exec, signals, f"{API_URL}/render", payload, timeout=600)
+
+    @staticmethod
+    def _submit(
+        executor: concurrent.futures.ThreadPoolExecutor,
+        signals: _JobSignals,
+        url: str,
+        payload: dict[str, str | None],
+        timeout: float,
+    ) -> None:
+        future = executor.submit(_request_json, url, payload, timeout)
+
+        def _done(fut: concurrent.futures.Future) -> None:
+            # ワーカースレッド上で呼ばれるため、GUI 操作はシグナル
+            # (QueuedConnection) 経由で GUI スレッドに渡す。
+            try:
+                signals.finishedWithResult.emit(fut.result())
+            except requests.HTTPError as exc:
+                # エラー本文は JSON とは限らない (未処理例外は text/plain の
+                # "Internal Server Error")。解析に失敗したら str(exc) に戻す。
+                detail = str(exc)
+                if exc.response is not None:
+                    try:
+                        detail = str(_loads(exc.response.content).get("detail", detail))
+                    except Exception:
+                        pass
+                signals.failed.emit(detail)
+            except Exception as exc:
+                signals.failed.emit(str(exc))
+            finally:
+                signals.done.emit()
+
+        future.add_done_callback(_done)
+
+    def _check_input(self, path_str: str, message: str, *, check_size: bool = False) -> bool:
+        # Path 生成 + exists() の代わりに os.stat 一回で存在確認する
+        # (空文字列も OSError になる)。
+        try:
+            stat = os.stat(path_str)
+        except OSError:
+            self._log(message)
+            return False
+        if check_size and stat.st_size > _MAX_INPUT_BYTES:
+            self._log(
+                f"ファイルが大きすぎます ({stat.st_size // (1024 * 1024)} MB、"
+                f"上限 {_MAX_INPUT_BYTES // (1024 * 1024)} MB): {path_str}"
+            )
+            return False
+        return True
+
+    def _on_generate_success(self, data: dict[str, object]) -> None:
+        self._last_pdf = str(data.get("pdf")) if data.get("pdf") else None
+        self.print_btn.setEnabled(bool(self._last_pdf))
+        self._log(
+            f"PDF を生成しました。行数: {data.get('rows')} 件 / ページ数: {data.get('pages')}。 出力先: {data.get('pdf')}"
+        )
+
+    def _on_generate_failed(self, message: str) -> None:
+        self._log(f"生成処理でエラー: {message}")
+
+    def _on_print(self) -> None:
+        if not self._last_pdf:
+            self._log("先に PDF を生成してください。")
+            return
+        printer = self.printer_combo.currentText()
+        payload = {"pdf_path": self._last_pdf, "printer_name": printer or None}
+        self._log("印刷ジョブを送信します...")
+        self.print_btn.setEnabled(False)
+        signals = _JobSignals()
+        signals.finishedWithResult.connect(lambda _data: self._on_print_success())
+        signals.failed.connect(self._on_print_failed)
+        signals.done.connect(lambda: self.print_btn.setEnabled(True))
+        self._print_worker = signals
+        self._submit(self._print_exec, signals, f"{API_URL}/print", payload, timeout=120)
+
+    def _on_print_success(self) -> None:
+        self._log("印刷ジョブを受け付けました。プリンタ側で確認してください。")
+
+    def _on_print_failed(self, message: str) -> None:
+        self._log(f"印刷エラー: {message}")
+
+    def _log(self, message: str) -> None:
+        self._log_buf.append(message)
+        if not self._log_timer.isActive():
+            self._log_timer.start()
+
+    def _flush_log(self) -> None:
+        if not self._log_buf:
+            return
+        self.log.appendPlainText("\n".join(self._log_buf))
+        self._log_buf.clear()
+
+    def _refresh_printers(self) -> None:
+        self.printer_combo.clear()
+        printers = _cached_list_printers()
+        if printers:
+            self.printer_combo.addItems(list(printers))
+            self.printer_combo.setEnabled(True)
+        else:
+            self.printer_combo.addItem("(プリンタ情報なし)")
+            self.printer_combo.setEnabled(False)
+
+    def _reload_printers(self) -> None:
+        _cached_list_printers.cache_clear()
+        self._refresh_printers()
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        self._generate_exec.shutdown(wait=False, cancel_futures=True)
+        self._print_exec.shutdown(wait=False, cancel_futures=True)
+        super().closeEvent(event)
+
+
+def run_gui_inprocess() -> None:
+    """Qt と uvicorn を単一の qasync イベントループで動かす (PICKING_INPROCESS=1)。
+
+    別スレッド + 独立 asyncio ループの構成を避け、GUI とサーバで
+    ループを共有する。API 呼び出しは互換性のため従来どおり
+    ループバック HTTP を使う。
+    """
+    import asyncio
+
+    import qasync
+
+    app = QtWidgets.QApplication([])
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    # uvicorn に新しいループを作らせず、qasync のループ上で serve() を回す
+    server = _build_server(loop="none")
+    window = MainWindow()
+    window.show()
+    with loop:
+        loop.create_task(server.serve())
+        loop.run_forever()
@@ -1,10 +1,33 @@
-import pandas as pd
+import pytest
 
 from src.app_core.config import load_config
 from src.app_core.pipeline import build_bom_lookup, join_and_map, paginate
 
 
-def test_paginate_and_numbering():
+@pytest.fixture(scope="module")
+def config():
+    return load_config().data
+
+
+@pytest.fixture(scope="module")
+def master_df():
+    import pandas as pd
+
+    return pd.DataFrame(
+        {
+            "品目コード": ["A", "COMP-1", "COMP-2"],
+            "品目テキストマスタ": ["サンプル製品", "子部品1", "子部品2"],
+            "品目種別": ["完成品", "子部品", "子部品"],
+            "得意先発注番号": ["ORD-001", "", ""],
+            "備考": ["注意事項", "", ""],
+            "ピッキング可能ロケ地": ["LOC-MST", "LOC-CH1", "LOC-CH2"],
+        }
+    )
+
+
+def test_paginate_and_numbering(config, master_df):
+    import pandas as pd
+
     shipment = pd.DataFrame(
         {
             "品目コード": ["A"] * 7,
@@ -14,19 +37,8 @@ def test_paginate_and_numbering():
             "保管場所": ["LOC"] * 7,
         }
     )
-    master = pd.DataFrame(
-        {
-            "品目コード": ["A"],
-            "品目テキストマスタ": ["サンプル製品"],
-            "品目種別": ["完成品"],
-            "得意先発注番号": ["ORD-001"],
-            "備考": ["注意事項"],
-            "ピッキング可能ロケ地": ["LOC-MST"],
-        }
-    )
 
-    config = load_config().data
-    rows = join_and_map(shipment, master, config)
+    rows = join_and_map(shipment, master_df, config)
     assert len(rows) == 7
     assert rows[0].notice == "注意事項"
     assert rows[0].no == "1"
@@ -41,7 +53,9 @@ def test_paginate_and_numbering():
     assert len(pages[1]) == 1
 
 
-def test_join_and_map_with_bom_children():
+def test_join_and_map_with_bom_children(config, master_df):
+    import pandas as pd
+
     shipment = pd.DataFrame(
         {
             "品目コード": ["A"],
@@ -51,16 +65,6 @@ def test_join_and_map_with_bom_children():
             "保管場所": ["LOC"],
         }
     )
-    master = pd.DataFrame(
-        {
-            "品目コード": ["A", "COMP-1", "COMP-2"],
-            "品目テキストマスタ": ["完成品", "子部品1", "子部品2"],
-            "品目種別": ["完成品", "子部品", "子部品"],
-            "得意先発注番号": ["ORD-001", "", ""],
-            "備考": ["指示あり", "", ""],
-            "ピッキング可能ロケ地": ["LOC-PARENT", "LOC-CH1", "LOC-CH2"],
-        }
-    )
 
     bom_df = pd.DataFrame(
         {
@@ -74,13 +78,12 @@ def test_join_and_map_with_bom_children():
         }
     )
 
-    config = load_config().data
     assert config.bom is not None
     bom_lookup = build_bom_lookup(bom_df, config.bom)
 
-    rows = join_and_map(shipment, master, config, bom_lookup=bom_lookup)
+    rows = join_and_map(shipment, master_df, config, bom_lookup=bom_lookup)
     assert len(rows) == 3
-    assert rows[0].notice == "指示あり"
+    assert rows[0].notice == "注意事項"
 
     parent, child_one, child_two = rows
     assert parent.no == "1"
@@ -91,7 +94,7 @@ def test_join_and_map_with_bom_children():
     assert child_one.quantity_note == "2 × 3"
     assert child_one.itemType == "子部品"
     assert child_one.parent_no == "1"
-    assert child_one.notice == "指示あり"
+    assert child_one.notice == "注意事項"
     assert child_one.location == "LOC-CH1"
     assert child_one.sequence == 2
 